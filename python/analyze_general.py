@@ -1,6 +1,7 @@
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import DocumentAnalysisFeature, AnalyzeResult
+import os
 
 def _in_span(word, spans):
     for span in spans:
@@ -20,8 +21,9 @@ def _format_polygon(polygon):
         return "N/A"
     return ", ".join([f"[{polygon[i]}, {polygon[i + 1]}]" for i in range(0, len(polygon), 2)])
 
-endpoint = "https://docintelgmcopilot.cognitiveservices.azure.com/"
-key = "60bd3ea71602420ea4bbef6904ab2c5c"
+# DOCUMENTINTELLIGENCE_ENDPOINT / _API_KEY override these, e.g. to point at fake_docintel_server.py
+endpoint = os.environ.get("DOCUMENTINTELLIGENCE_ENDPOINT", "https://docintelgmcopilot.cognitiveservices.azure.com/")
+key = os.environ.get("DOCUMENTINTELLIGENCE_API_KEY", "60bd3ea71602420ea4bbef6904ab2c5c")
 
 path_to_sample_documents = "C://Users//jfattic//Desktop//Daggerheart//Quickstart-Adventure-5-20-2025.pdf"
 
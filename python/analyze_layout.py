@@ -1,6 +1,8 @@
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import AnalyzeResult
+import os
+from confidence import extract_confidences, save_confidences, page_report
 
 def _in_span(word, spans):
     for span in spans:
@@ -13,8 +15,9 @@ def _format_polygon(polygon):
         return "N/A"
     return ", ".join([f"[{polygon[i]}, {polygon[i + 1]}]" for i in range(0, len(polygon), 2)])
 
-endpoint = "https://docintelgmcopilot.cognitiveservices.azure.com/"
-key = "60bd3ea71602420ea4bbef6904ab2c5c"
+# DOCUMENTINTELLIGENCE_ENDPOINT / _API_KEY override these, e.g. to point at fake_docintel_server.py
+endpoint = os.environ.get("DOCUMENTINTELLIGENCE_ENDPOINT", "https://docintelgmcopilot.cognitiveservices.azure.com/")
+key = os.environ.get("DOCUMENTINTELLIGENCE_API_KEY", "60bd3ea71602420ea4bbef6904ab2c5c")
 
 path_to_sample_documents = "C:\\Users\\jfattic\\Desktop\\Daggerheart\\Daggerheart-Errata-5-20-2025.pdf"
 
@@ -23,6 +26,11 @@ with open(path_to_sample_documents, "rb") as f:
     poller = document_intelligence_client.begin_analyze_document("prebuilt-layout", body=f)
 result: AnalyzeResult = poller.result()
 
+# Keep word / selection-mark confidences for confidence.py instead of only printing them.
+confidences = extract_confidences(result)
+confidence_path = os.path.splitext(os.path.basename(path_to_sample_documents.replace("\\", "/")))[0] + ".npz"
+save_confidences(confidences, confidence_path)
+
 if result.styles and any([style.is_handwritten for style in result.styles]):
     print("Document contains handwritten content")
 else:
@@ -87,4 +95,8 @@ if result.tables:
                         f"...content on page {region.page_number} is within bounding polygon '{_format_polygon(region.polygon)}'"
                     )
 
+print("----Word confidence per page----")
+print(page_report(confidences).to_string(index=False))
+print(f"Confidences written to: {confidence_path}")
+
 print("----------------------------------------")
\ No newline at end of file
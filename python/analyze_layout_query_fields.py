@@ -7,8 +7,9 @@ def analyze_query_fields():
     from azure.ai.documentintelligence.models import AnalyzeDocumentRequest, DocumentAnalysisFeature, AnalyzeResult
     import json
     
-    endpoint = "https://docintelgmcopilot.cognitiveservices.azure.com/"
-    key = "60bd3ea71602420ea4bbef6904ab2c5c"
+    # DOCUMENTINTELLIGENCE_ENDPOINT / _API_KEY override these, e.g. to point at fake_docintel_server.py
+    endpoint = os.environ.get("DOCUMENTINTELLIGENCE_ENDPOINT", "https://docintelgmcopilot.cognitiveservices.azure.com/")
+    key = os.environ.get("DOCUMENTINTELLIGENCE_API_KEY", "60bd3ea71602420ea4bbef6904ab2c5c")
 
     path_to_sample_documents = "C://Users//jfattic//Desktop//Daggerheart//Quickstart-Adventure-5-20-2025.pdf"
 
@@ -0,0 +1,459 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# c:\src\DocumentStudy\python\confidence.py
+"""
+Collect word and selection-mark confidences from Document Intelligence AnalyzeResult output and
+summarize them per page and per document, so low-quality scans can be picked out for re-scanning.
+
+Usage:
+    python confidence.py results/ --cache confidence_cache/ --report confidence_report.csv
+
+Inputs:
+    - a directory (or glob) of AnalyzeResult JSON files, e.g. json.dump(result.as_dict(), f)
+    - cached .npz arrays written by save_confidences() (analyze_layout.py writes one per run)
+A result JSON is only parsed when its .npz cache is missing, older than the JSON, or was written
+for a different JSON (each .npz records its source path); aggregation over thousands of documents
+works directly on the cached float32 arrays. The cache sits next to each JSON (doc.json -> doc.npz)
+unless --cache points somewhere else, where names carry a hash of the JSON's absolute path
+(doc-<hash>.npz) so same-named results from different directories don't collide.
+Document ids are the JSON base names and must be unique across all inputs.
+
+Checks:
+    python confidence.py --self-check
+
+Outputs:
+    - per-document CSV report: word/mark counts, mean, quantiles, low-confidence word rate
+    - optional per-page CSV report with the same metrics plus a confidence histogram per page
+    - optional CSV of low-confidence word spans (runs of consecutive low-confidence words)
+"""
+
+# -----------------------
+# Extraction
+# -----------------------
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+DEFAULT_BINS = 10
+DEFAULT_THRESHOLD = 0.8
+
+
+def _field(obj, name):
+    # AnalyzeResult models are mappings keyed by REST (camelCase) names, same as the raw JSON,
+    # so a plain .get() works for both SDK objects and json.load()'ed results.
+    if obj is None:
+        return None
+    return obj.get(name)
+
+
+def extract_confidences(result):
+    """
+    Flatten an AnalyzeResult (SDK model or parsed JSON dict) into numpy arrays.
+    Returns dict with:
+        word_confidence (float32), word_page (int32), word_offset (int64), word_length (int32),
+        mark_confidence (float32), mark_page (int32), page_numbers (int32)
+    page_numbers lists every analyzed page, including blank ones with no words or marks.
+    Words keep their document order so adjacent low-confidence words can be merged into spans.
+    """
+    word_conf, word_page, word_offset, word_length = [], [], [], []
+    mark_conf, mark_page, page_numbers = [], [], []
+    for page in _field(result, "pages") or []:
+        page_number = _field(page, "pageNumber")
+        page_numbers.append(page_number)
+        for word in _field(page, "words") or []:
+            conf = _field(word, "confidence")
+            span = _field(word, "span") or {}
+            word_conf.append(np.nan if conf is None else conf)
+            word_page.append(page_number)
+            word_offset.append(_field(span, "offset") or 0)
+            word_length.append(_field(span, "length") or 0)
+        for mark in _field(page, "selectionMarks") or []:
+            conf = _field(mark, "confidence")
+            mark_conf.append(np.nan if conf is None else conf)
+            mark_page.append(page_number)
+    return {
+        "word_confidence": np.asarray(word_conf, dtype=np.float32),
+        "word_page": np.asarray(word_page, dtype=np.int32),
+        "word_offset": np.asarray(word_offset, dtype=np.int64),
+        "word_length": np.asarray(word_length, dtype=np.int32),
+        "mark_confidence": np.asarray(mark_conf, dtype=np.float32),
+        "mark_page": np.asarray(mark_page, dtype=np.int32),
+        "page_numbers": np.asarray(page_numbers, dtype=np.int32),
+    }
+
+
+def _page_numbers(arrays):
+    # caches written before page_numbers existed only know pages that had words or marks
+    if "page_numbers" in arrays:
+        return np.unique(arrays["page_numbers"])
+    return np.unique(np.concatenate((arrays["word_page"], arrays["mark_page"])))
+
+
+def _source(arrays):
+    return str(arrays["source"]) if "source" in arrays else None
+
+
+def save_confidences(arrays, out_path):
+    np.savez(out_path, **arrays)
+
+
+def load_confidences(path):
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+
+def _cache_path(json_path, cache_dir=None):
+    # next to the JSON the base name is unique; in a shared cache dir add a hash of the full path
+    base = os.path.splitext(os.path.basename(json_path))[0]
+    if not cache_dir:
+        return os.path.join(os.path.dirname(json_path), base + ".npz")
+    digest = hashlib.sha1(os.path.abspath(json_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{base}-{digest}.npz")
+
+
+def load_or_extract(json_path, cache_dir=None):
+    """
+    Return confidence arrays for an AnalyzeResult JSON file, reusing the .npz cache when it is
+    at least as new as the JSON and was written for this JSON. Parsed results are written back
+    to the cache, which is `cache_dir` if given, otherwise the JSON's own directory.
+    """
+    source = os.path.abspath(json_path)
+    npz_path = _cache_path(json_path, cache_dir)
+    if os.path.exists(npz_path) and os.path.getmtime(npz_path) >= os.path.getmtime(json_path):
+        arrays = load_confidences(npz_path)
+        if _source(arrays) == source:
+            return arrays
+    with open(json_path, "r", encoding="utf-8") as f:
+        arrays = extract_confidences(json.load(f))
+    arrays["source"] = np.asarray(source)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    save_confidences(arrays, npz_path)
+    return arrays
+
+
+# -----------------------
+# Vectorized statistics
+# -----------------------
+def grouped_quantiles(values, groups, quantiles=DEFAULT_QUANTILES):
+    """
+    Per-group quantiles with linear interpolation (same as np.quantile's default), without a
+    Python loop over groups. NaN values are dropped.
+    Returns (unique_groups, counts, matrix[len(unique_groups), len(quantiles)]).
+    """
+    values = np.asarray(values, dtype=np.float32)
+    groups = np.asarray(groups)
+    keep = ~np.isnan(values)
+    values, groups = values[keep], groups[keep]
+    q = np.asarray(quantiles, dtype=np.float64)
+    if values.size == 0:
+        return groups[:0], np.zeros(0, dtype=np.int64), np.zeros((0, q.size), dtype=np.float32)
+    # sort by group, then by value inside each group
+    order = np.lexsort((values, groups))
+    values, groups = values[order], groups[order]
+    uniq, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    pos = q[None, :] * (counts[:, None] - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts[:, None] - 1)
+    frac = (pos - lo).astype(np.float32)
+    v_lo = values[starts[:, None] + lo]
+    v_hi = values[starts[:, None] + hi]
+    return uniq, counts, v_lo + (v_hi - v_lo) * frac
+
+
+def grouped_histograms(values, groups, bins=DEFAULT_BINS):
+    """
+    Per-group histograms over [0, 1] with `bins` equal-width bins, built with a single bincount.
+    Returns (unique_groups, matrix[len(unique_groups), bins]).
+    """
+    values = np.asarray(values, dtype=np.float32)
+    groups = np.asarray(groups)
+    keep = ~np.isnan(values)
+    values, groups = values[keep], groups[keep]
+    uniq, group_idx = np.unique(groups, return_inverse=True)
+    bin_idx = np.clip((values * bins).astype(np.int64), 0, bins - 1)
+    flat = np.bincount(group_idx * bins + bin_idx, minlength=uniq.size * bins)
+    return uniq, flat.reshape(uniq.size, bins)
+
+
+def low_confidence_spans(arrays, threshold=DEFAULT_THRESHOLD):
+    """
+    Merge runs of consecutive words (document order, same page) whose confidence is below
+    `threshold` into spans. Returns a DataFrame with page, offset, length, word_count,
+    min_confidence, mean_confidence.
+    """
+    conf = arrays["word_confidence"]
+    page = arrays["word_page"]
+    offset = arrays["word_offset"]
+    length = arrays["word_length"]
+    columns = ["page", "offset", "length", "word_count", "min_confidence", "mean_confidence"]
+    low = conf < threshold
+    if not low.any():
+        return pd.DataFrame(columns=columns)
+    # a new run starts at a low word whose predecessor is not low or sits on another page
+    prev_low = np.concatenate(([False], low[:-1]))
+    same_page = np.concatenate(([False], page[1:] == page[:-1]))
+    run_start = low & ~(prev_low & same_page)
+    run_id = np.cumsum(run_start)[low] - 1
+    idx = np.flatnonzero(low)
+    counts = np.bincount(run_id)
+    first = np.cumsum(counts) - counts
+    starts = idx[first]
+    last = idx[first + counts - 1]
+    return pd.DataFrame({
+        "page": page[starts],
+        "offset": offset[starts],
+        "length": offset[last] + length[last] - offset[starts],
+        "word_count": counts,
+        "min_confidence": np.minimum.reduceat(conf[idx], first),
+        "mean_confidence": np.bincount(run_id, weights=conf[idx]) / counts,
+    }, columns=columns)
+
+
+# -----------------------
+# Reports
+# -----------------------
+def _quantile_columns(quantiles):
+    return [f"word_q{int(round(q * 100)):02d}" for q in quantiles]
+
+
+def page_report(arrays, quantiles=DEFAULT_QUANTILES, bins=DEFAULT_BINS, threshold=DEFAULT_THRESHOLD):
+    """Per-page word/mark confidence summary with a word-confidence histogram per page."""
+    conf, page = arrays["word_confidence"], arrays["word_page"]
+    pages, counts, qmat = grouped_quantiles(conf, page, quantiles)
+    df = pd.DataFrame(qmat, columns=_quantile_columns(quantiles))
+    df.insert(0, "page", pages)
+    df.insert(1, "word_count", counts)
+    valid = ~np.isnan(conf)
+    pos = np.searchsorted(pages, page[valid])
+    df.insert(2, "word_mean", np.bincount(pos, weights=conf[valid], minlength=pages.size) / np.maximum(counts, 1))
+    df["low_confidence_words"] = np.bincount(pos, weights=conf[valid] < threshold, minlength=pages.size).astype(np.int64)
+    df["low_confidence_rate"] = df["low_confidence_words"] / np.maximum(counts, 1)
+    _, hist = grouped_histograms(conf, page, bins)
+    for b in range(bins):
+        df[f"hist_{b / bins:.2f}_{(b + 1) / bins:.2f}"] = hist[:, b]
+    mark_pages, mark_counts, mark_q = grouped_quantiles(arrays["mark_confidence"], arrays["mark_page"], (0.5,))
+    marks = pd.DataFrame({"page": mark_pages, "mark_count": mark_counts, "mark_median": mark_q[:, 0]})
+    df = df.merge(marks, on="page", how="outer")
+    # blank pages (no words or marks) still get a row
+    df = df.merge(pd.DataFrame({"page": _page_numbers(arrays)}), on="page", how="outer")
+    # pages without words and/or marks get zero counts; only the quantile, mean and median
+    # columns stay NaN there
+    count_columns = ["word_count", "low_confidence_words", "mark_count"] + [c for c in df.columns if c.startswith("hist_")]
+    df[count_columns] = df[count_columns].fillna(0).astype(np.int64)
+    df["low_confidence_rate"] = df["low_confidence_rate"].fillna(0.0)
+    return df.sort_values("page").reset_index(drop=True)
+
+
+def aggregate(named_arrays, quantiles=DEFAULT_QUANTILES, threshold=DEFAULT_THRESHOLD):
+    """
+    named_arrays: iterable of (docid, arrays) as produced by extract_confidences/load_confidences.
+    Concatenates all documents into one set of arrays and computes per-document statistics in a
+    single vectorized pass. Returns a DataFrame sorted worst first: documents with no words at all
+    (flagged in `no_words`, word statistics NaN) on top, then by low-confidence rate.
+    """
+    docids, word_parts, word_doc, mark_parts, mark_doc, pages = [], [], [], [], [], []
+    for i, (docid, arrays) in enumerate(named_arrays):
+        docids.append(docid)
+        word_parts.append(arrays["word_confidence"])
+        word_doc.append(np.full(arrays["word_confidence"].size, i, dtype=np.int32))
+        mark_parts.append(arrays["mark_confidence"])
+        mark_doc.append(np.full(arrays["mark_confidence"].size, i, dtype=np.int32))
+        pages.append(_page_numbers(arrays).size)
+    if not docids:
+        return pd.DataFrame()
+    n = len(docids)
+    conf = np.concatenate(word_parts)
+    doc = np.concatenate(word_doc)
+    valid = ~np.isnan(conf)
+    conf, doc = conf[valid], doc[valid]
+
+    word_count = np.bincount(doc, minlength=n)
+    df = pd.DataFrame({
+        "docid": docids,
+        "pages": pages,
+        "word_count": word_count,
+        "no_words": word_count == 0,
+        "word_mean": np.where(word_count > 0, np.bincount(doc, weights=conf, minlength=n) / np.maximum(word_count, 1), np.nan),
+    })
+    qcols = _quantile_columns(quantiles)
+    for col in qcols:
+        df[col] = np.nan
+    uniq, _, qmat = grouped_quantiles(conf, doc, quantiles)
+    df.loc[uniq, qcols] = qmat
+    low = np.bincount(doc, weights=conf < threshold, minlength=n).astype(np.int64)
+    df["low_confidence_words"] = low
+    df["low_confidence_rate"] = low / np.maximum(word_count, 1)
+
+    mconf = np.concatenate(mark_parts)
+    mdoc = np.concatenate(mark_doc)
+    mvalid = ~np.isnan(mconf)
+    mconf, mdoc = mconf[mvalid], mdoc[mvalid]
+    mark_count = np.bincount(mdoc, minlength=n)
+    df["mark_count"] = mark_count
+    df["mark_mean"] = np.where(mark_count > 0, np.bincount(mdoc, weights=mconf, minlength=n) / np.maximum(mark_count, 1), np.nan)
+    return df.sort_values(["no_words", "low_confidence_rate"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _discover(inputs):
+    # expand directories and globs into a sorted list of .json / .npz files
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, "*.json")))
+            paths.extend(glob.glob(os.path.join(item, "*.npz")))
+        else:
+            paths.extend(glob.glob(item))
+    return sorted(set(paths))
+
+
+def iter_documents(inputs, cache_dir=None):
+    """
+    Yield (docid, arrays) for every result found in `inputs`. A cached .npz whose source JSON is
+    also among the inputs is skipped; the JSON goes through the cache check in load_or_extract.
+    Raises ValueError when two inputs resolve to the same docid.
+    """
+    paths = _discover(inputs)
+    json_paths = {os.path.abspath(p) for p in paths if p.lower().endswith(".json")}
+    seen = {}
+    for path in paths:
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".json":
+            arrays = load_or_extract(path, cache_dir)
+        elif ext == ".npz":
+            arrays = load_confidences(path)
+            source = _source(arrays)
+            if source is None:
+                # pre-source caches: doc.npz stands for a doc.json in the same directory
+                source = os.path.splitext(os.path.abspath(path))[0] + ".json"
+            if source in json_paths:
+                continue
+            path = source
+        else:
+            continue
+        path = os.path.abspath(path)
+        docid = os.path.splitext(os.path.basename(path))[0]
+        if docid in seen:
+            raise ValueError(f"Duplicate document id '{docid}': {seen[docid]} and {path}")
+        seen[docid] = path
+        yield docid, arrays
+
+
+# -----------------------
+# Self-check
+# -----------------------
+def _self_check():
+    """Compare the vectorized statistics with straightforward per-group numpy and check the cache."""
+    rng = np.random.default_rng(0)
+    conf = rng.random(500).astype(np.float32)
+    conf[rng.integers(0, 500, 20)] = np.nan
+    page = np.sort(rng.integers(1, 8, 500)).astype(np.int32)
+
+    uniq, counts, qmat = grouped_quantiles(conf, page)
+    for i, g in enumerate(uniq):
+        vals = conf[(page == g) & ~np.isnan(conf)]
+        assert counts[i] == vals.size, f"count mismatch on group {g}"
+        assert np.allclose(qmat[i], np.quantile(vals, DEFAULT_QUANTILES), atol=1e-6), f"quantile mismatch on group {g}"
+
+    uniq, hist = grouped_histograms(conf, page, bins=DEFAULT_BINS)
+    for i, g in enumerate(uniq):
+        vals = conf[(page == g) & ~np.isnan(conf)]
+        expected = np.histogram(vals, bins=DEFAULT_BINS, range=(0.0, 1.0))[0]
+        assert np.array_equal(hist[i], expected), f"histogram mismatch on group {g}"
+
+    arrays = {
+        "word_confidence": conf, "word_page": page,
+        "word_offset": np.arange(500, dtype=np.int64) * 4, "word_length": np.full(500, 3, dtype=np.int32),
+    }
+    spans = low_confidence_spans(arrays, DEFAULT_THRESHOLD)
+    expected_runs = []
+    for i in range(500):
+        if conf[i] < DEFAULT_THRESHOLD:
+            if expected_runs and expected_runs[-1][1] == i - 1 and page[i - 1] == page[i]:
+                expected_runs[-1][1] = i
+            else:
+                expected_runs.append([i, i])
+    assert len(spans) == len(expected_runs), "span count mismatch"
+    for (a, b), (_, row) in zip(expected_runs, spans.iterrows()):
+        assert row["word_count"] == b - a + 1 and row["offset"] == a * 4, "span bounds mismatch"
+        assert np.isclose(row["min_confidence"], conf[a:b + 1].min()), "span min mismatch"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # same base name in two directories must not share a cache entry
+        cache = os.path.join(tmp, "cache")
+        for name, value in (("d1", 0.1), ("d2", 0.9)):
+            os.makedirs(os.path.join(tmp, name))
+            with open(os.path.join(tmp, name, "doc.json"), "w", encoding="utf-8") as f:
+                json.dump({"pages": [{"pageNumber": 1, "words": [{"confidence": value, "span": {"offset": 0, "length": 1}}]},
+                                     {"pageNumber": 2}]}, f)
+        for _ in range(2):  # second pass is served from the cache
+            a1 = load_or_extract(os.path.join(tmp, "d1", "doc.json"), cache)
+            a2 = load_or_extract(os.path.join(tmp, "d2", "doc.json"), cache)
+            assert np.allclose(a1["word_confidence"], [0.1]) and np.allclose(a2["word_confidence"], [0.9]), "cache collision"
+        try:
+            list(iter_documents([os.path.join(tmp, "d1"), os.path.join(tmp, "d2")], cache))
+            raise AssertionError("duplicate docid was not rejected")
+        except ValueError:
+            pass
+        # blank page 2 is counted and reported
+        assert aggregate([("doc", a1)])["pages"].iloc[0] == 2, "blank page not counted"
+        assert list(page_report(a1)["page"]) == [1, 2], "blank page missing from page report"
+        empty = extract_confidences({"pages": [{"pageNumber": 1}]})
+        report = aggregate([("doc", a1), ("blank", empty)])
+        assert report["docid"].iloc[0] == "blank" and np.isnan(report["word_mean"].iloc[0]), "zero-word doc not first"
+    print("Self-check passed")
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize word and selection-mark confidences from AnalyzeResult output.")
+    parser.add_argument("inputs", nargs="*", help="Directories or globs of AnalyzeResult JSON files and/or cached .npz files")
+    parser.add_argument("--cache", "-c", default=None, help="Directory for cached .npz confidence arrays (default: next to each JSON)")
+    parser.add_argument("--threshold", "-t", type=float, default=DEFAULT_THRESHOLD, help="Words below this confidence are counted as low-confidence")
+    parser.add_argument("--bins", "-b", type=int, default=DEFAULT_BINS, help="Number of histogram bins over [0, 1] for the page report")
+    parser.add_argument("--report", "-r", default="confidence_report.csv", help="Path to write per-document report CSV")
+    parser.add_argument("--pages", default=None, help="Path to write per-page report CSV (with histograms)")
+    parser.add_argument("--spans", default=None, help="Path to write low-confidence word spans CSV")
+    parser.add_argument("--self-check", action="store_true", help="Run the built-in checks of the statistics and cache, then exit")
+    args = parser.parse_args()
+
+    if args.self_check:
+        _self_check()
+        return
+    if not args.inputs:
+        parser.error("at least one input is required")
+
+    docs = list(iter_documents(args.inputs, args.cache))
+    report = aggregate(docs, threshold=args.threshold)
+    report.to_csv(args.report, index=False)
+    print(f"Report written to: {args.report} ({len(docs)} documents)")
+
+    if args.pages:
+        frames = []
+        for docid, arrays in docs:
+            df = page_report(arrays, bins=args.bins, threshold=args.threshold)
+            df.insert(0, "docid", docid)
+            frames.append(df)
+        (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()).to_csv(args.pages, index=False)
+        print(f"Page report written to: {args.pages}")
+
+    if args.spans:
+        frames = []
+        for docid, arrays in docs:
+            df = low_confidence_spans(arrays, threshold=args.threshold)
+            df.insert(0, "docid", docid)
+            frames.append(df)
+        (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()).to_csv(args.spans, index=False)
+        print(f"Low-confidence spans written to: {args.spans}")
+
+    if len(report):
+        print(f"Worst document: {report['docid'].iloc[0]} (low-confidence rate {report['low_confidence_rate'].iloc[0]:.3f})")
+
+
+if __name__ == "__main__":
+    main()
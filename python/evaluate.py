@@ -27,6 +27,8 @@ Metrics produced per field:
     - average normalized string similarity (0..1)
     - numeric within-tolerance rate (when both values parse as numbers)
 Outputs a CSV summary and optionally a per-document diff CSV.
+With --store, the run (summary, per-field and per-cell rows) is also appended to a SQLite
+evaluation-history store; see results_store.py for cross-run queries.
 """
 
 # -----------------------
@@ -269,10 +271,11 @@ def load_predictions(path, id_column):
 # -----------------------
 # Evaluation logic
 # -----------------------
-def evaluate(ground_truth, predictions, numeric_tolerance=1e-6, relative_tolerance=False, verbose=False):
+def evaluate(ground_truth, predictions, numeric_tolerance=1e-6, relative_tolerance=False, verbose=False, cells=None):
     """
     ground_truth: dict docid -> dict(field -> value)
     predictions: dict docid -> dict(field -> value)
+    cells: optional list; when given, one dict per compared (docid, field) is appended to it
     Returns: (report_rows_list, overall_summary_dict, per_doc_diffs_list)
     """
     # per-field statistics container with default counters
@@ -303,7 +306,8 @@ def evaluate(ground_truth, predictions, numeric_tolerance=1e-6, relative_toleran
                 stats["missing_predictions"] += 1
 
             # simple exact string match check after trimming
-            if str(gt_val).strip() == str(pred_val).strip():
+            exact = str(gt_val).strip() == str(pred_val).strip()
+            if exact:
                 stats["exact_matches"] += 1
 
             # compute normalized string similarity
@@ -324,6 +328,18 @@ def evaluate(ground_truth, predictions, numeric_tolerance=1e-6, relative_toleran
                     if abs(gt_num - pred_num) <= numeric_tolerance:
                         stats["numeric_within_tol"] += 1
 
+            if cells is not None:
+                cells.append({
+                    "docid": docid,
+                    "field": field,
+                    "ground_truth": gt_val,
+                    "prediction": pred_val,
+                    "exact_match": exact,
+                    "similarity": sim,
+                    "gt_num": gt_num,
+                    "pred_num": pred_num,
+                })
+
             # add diffs for suspicious items if verbose:
             if verbose:
                 numeric_bad = False
@@ -451,20 +467,31 @@ def main():
     parser.add_argument("--report", "-r", default="evaluation_report.csv", help="Path to write per-field report CSV")
     parser.add_argument("--diffs", "-d", default="differences.csv", help="Path to write per-document differences CSV (only when verbose)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Include per-document diffs for suspicious items")
+    parser.add_argument("--store", "-s", default=None, help="Path to a SQLite evaluation-history store to append this run to")
+    parser.add_argument("--run-label", default=None, help="Label stored with the run (e.g. model or prompt version)")
     args = parser.parse_args()
 
     gt = load_ground_truth(args.ground_truth, args.id_column)
     preds = load_predictions(args.predictions, args.id_column)
 
+    cells = [] if args.store else None
     report, overall, diffs = evaluate(gt, preds, numeric_tolerance=args.numeric_tolerance,
                                      relative_tolerance=args.relative_tolerance,
-                                     verbose=args.verbose)
+                                     verbose=args.verbose, cells=cells)
 
     write_csv_report(report, overall, args.report)
     if args.verbose:
         write_diffs(diffs, args.diffs)
 
     print(f"Report written to: {args.report}")
+    if args.store:
+        # imported lazily so plain CSV runs don't touch sqlite
+        import results_store
+        conn = results_store.connect(args.store)
+        run_id = results_store.record_run(conn, report, overall, cells, label=args.run_label,
+                                          ground_truth=args.ground_truth, predictions=args.predictions)
+        conn.close()
+        print(f"Run {run_id} appended to: {args.store}")
     if args.verbose:
         print(f"Differences written to: {args.diffs}")
     print(f"Overall exact match rate: {overall['exact_match_rate']:.3f}")
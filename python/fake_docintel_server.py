@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# c:\src\DocumentStudy\python\fake_docintel_server.py
+"""
+Local stand-in for the Document Intelligence analyze endpoint, for offline throughput and load
+testing of the analyze scripts (see loadtest.py).
+
+Implements the long-running-operation protocol used by DocumentIntelligenceClient.begin_analyze_document:
+    POST {endpoint}/documentintelligence/documentModels/{modelId}:analyze?api-version=...
+        -> 202 Accepted, Operation-Location: .../documentModels/{modelId}/analyzeResults/{resultId}
+    GET  {endpoint}/documentintelligence/documentModels/{modelId}/analyzeResults/{resultId}
+        -> 200 {"status": "running"} until the simulated processing time has elapsed,
+           then 200 {"status": "succeeded", "analyzeResult": {...}}
+The older "formrecognizer" path prefix is accepted as well.
+
+Usage:
+    python fake_docintel_server.py --port 5080 --recordings recordings/ --latency 0.05 --per-page 0.2 --throttle-rate 0.1
+    set DOCUMENTINTELLIGENCE_ENDPOINT=http://127.0.0.1:5080/  (then run analyze_*.py or loadtest.py)
+
+Recordings:
+    Recorded AnalyzeResult JSON, e.g. json.dump(result.as_dict(), f), one file per scenario:
+        layout.json          prebuilt-layout without add-on features (analyze_layout.py)
+        keyValuePairs.json   features=keyValuePairs (analyze_general.py)
+        queryFields.json     features=queryFields (analyze_layout_query_fields.py)
+    A scenario without a recording falls back to layout.json, then to a small built-in result
+    (10 identical pages, so the scripts' pages="7" works without recordings).
+    With a `pages` parameter the response's "pages" array is sliced to the requested page numbers
+    the recording has; other parts (content, paragraphs, tables, ...) are replayed unchanged.
+
+Simulation knobs:
+    --latency        fixed delay (seconds) added to every request before responding
+    --per-page       simulated processing time per analyzed page, i.e. per page in the response
+    --throttle-rate  probability that a POST/GET is answered with 429 + Retry-After
+    --retry-after    Retry-After (whole seconds) sent with 429; the SDK only retries a throttled
+                     POST when this header is present, as it is on the real service
+    --poll-after     Retry-After hint (seconds) sent with 202 and "running" responses
+    --result-ttl     seconds an operation stays retrievable after it finished (or was last
+                     fetched); expired operations are dropped so long soak tests don't grow memory
+A malformed `pages` value, or one that selects no page of the recording, is answered with
+400 InvalidArgument, like the real service.
+"""
+
+SCENARIOS = ("layout", "keyValuePairs", "queryFields")
+
+_ANALYZE_RE = re.compile(r"^/(?:documentintelligence|formrecognizer)/documentModels/([^/:]+):analyze$")
+_RESULT_RE = re.compile(r"^/(?:documentintelligence|formrecognizer)/documentModels/([^/:]+)/analyzeResults/([^/]+)$")
+
+
+def _builtin_result(model_id, page_count=10):
+    # minimal AnalyzeResult so the server works without any recordings
+    line = "Name: Barnacle Pronouns: He/Him"
+    content = "\n".join([line] * page_count)
+    pages = []
+    for number in range(1, page_count + 1):
+        start = (number - 1) * (len(line) + 1)
+        words = []
+        for m in re.finditer(r"\S+", line):
+            words.append({"content": m.group(0), "polygon": [0, 0, 1, 0, 1, 1, 0, 1],
+                          "confidence": 0.99, "span": {"offset": start + m.start(), "length": len(m.group(0))}})
+        pages.append({
+            "pageNumber": number, "angle": 0, "width": 8.5, "height": 11, "unit": "inch",
+            "spans": [{"offset": start, "length": len(line)}],
+            "words": words,
+            "selectionMarks": [],
+            "lines": [{"content": line, "polygon": [0, 0, 8, 0, 8, 1, 0, 1],
+                       "spans": [{"offset": start, "length": len(line)}]}],
+        })
+    return {
+        "apiVersion": "2024-11-30",
+        "modelId": model_id,
+        "stringIndexType": "textElements",
+        "content": content,
+        "pages": pages,
+        "paragraphs": [],
+        "tables": [],
+        "styles": [],
+        "keyValuePairs": [],
+        "documents": [],
+    }
+
+
+def parse_pages(pages_param):
+    """
+    Parse a `pages` query value such as "1-3,7" into a list of (first, last) ranges; `last` is
+    None for an open range like "5-". Returns None when no pages were requested.
+    Raises ValueError on malformed input.
+    """
+    if not pages_param:
+        return None
+    ranges = []
+    for part in pages_param.split(","):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"Empty page range in '{pages_param}'")
+        lo, sep, hi = part.partition("-")
+        first = int(lo) if lo.strip() else 1
+        last = (int(hi) if hi.strip() else None) if sep else first
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"Invalid page range '{part}'")
+        ranges.append((first, last))
+    return ranges
+
+
+def select_pages(ranges, available):
+    """
+    Page numbers from `available` selected by parse_pages() ranges (all of them when `ranges` is
+    None), as a sorted tuple. Raises ValueError when the ranges select none of them.
+    """
+    available = sorted(available)
+    if ranges is None:
+        return tuple(available)
+    selected = tuple(p for p in available
+                     if any(first <= p and (last is None or p <= last) for first, last in ranges))
+    if not selected:
+        shown = ",".join(f"{first}-{'' if last is None else last}" if last != first else str(first)
+                         for first, last in ranges)
+        raise ValueError(f"pages '{shown}' are outside the document (pages {available[0]}-{available[-1]})"
+                         if available else "the recording has no pages")
+    return selected
+
+
+class Recordings:
+    """Recorded AnalyzeResult per scenario, pre-serialized so responses don't re-encode JSON."""
+
+    def __init__(self, directory=None):
+        self.results = {}
+        if directory:
+            for scenario in SCENARIOS:
+                path = os.path.join(directory, scenario + ".json")
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    # accept both a bare AnalyzeResult and a full operation body
+                    self.results[scenario] = data.get("analyzeResult", data)
+        self._encoded = {}
+
+    def get(self, scenario, model_id, page_ranges=None):
+        """
+        Encoded result for a scenario restricted to the requested pages, and its page count.
+        Raises ValueError when `page_ranges` selects no page of the recording.
+        """
+        result = self.results.get(scenario) or self.results.get("layout") or _builtin_result(model_id)
+        all_pages = result.get("pages") or []
+        numbers = select_pages(page_ranges, [p.get("pageNumber") for p in all_pages])
+        key = (scenario, model_id, numbers)
+        if key not in self._encoded:
+            sliced = dict(result)
+            if len(numbers) != len(all_pages):
+                wanted = set(numbers)
+                sliced["pages"] = [p for p in all_pages if p.get("pageNumber") in wanted]
+            self._encoded[key] = json.dumps(sliced, ensure_ascii=False).encode("utf-8")
+        return self._encoded[key], max(1, len(numbers))
+
+
+def scenario_for(features):
+    # mirrors the add-on features each analyze script requests
+    if "queryFields" in features:
+        return "queryFields"
+    if "keyValuePairs" in features:
+        return "keyValuePairs"
+    return "layout"
+
+
+class FakeDocumentIntelligence:
+    """Operation state and simulation settings shared by all handler threads."""
+
+    def __init__(self, recordings, latency=0.0, per_page=0.0, throttle_rate=0.0, poll_after=0.1, retry_after=1,
+                 result_ttl=60.0, seed=None):
+        self.recordings = recordings
+        self.latency = latency
+        self.per_page = per_page
+        self.throttle_rate = throttle_rate
+        self.poll_after = poll_after
+        self.retry_after = retry_after
+        self.result_ttl = result_ttl
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._next_sweep = 0.0
+        self.stats = {"analyze": 0, "poll": 0, "throttled": 0, "succeeded": 0}
+
+    def throttled(self):
+        with self._lock:
+            hit = self.throttle_rate > 0 and self._random.random() < self.throttle_rate
+            if hit:
+                self.stats["throttled"] += 1
+        return hit
+
+    def _sweep(self, now):
+        # drop expired operations at most once a second; caller holds the lock
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 1.0
+        expired = [rid for rid, op in self._operations.items() if op["expires_at"] <= now]
+        for rid in expired:
+            del self._operations[rid]
+
+    def start(self, model_id, query, page_ranges=None):
+        """Register a new analyze operation; raises ValueError if the pages are not in the recording."""
+        features = ",".join(query.get("features", [])).split(",")
+        scenario = scenario_for(features)
+        body, pages = self.recordings.get(scenario, model_id, page_ranges)
+        now = time.monotonic()
+        ready_at = now + self.per_page * pages
+        op = {
+            "model_id": model_id,
+            "scenario": scenario,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+            "ready_at": ready_at,
+            "expires_at": ready_at + self.result_ttl,
+            "body": body,
+        }
+        result_id = str(uuid.uuid4())
+        with self._lock:
+            self._sweep(now)
+            self._operations[result_id] = op
+            self.stats["analyze"] += 1
+        return result_id
+
+    def poll(self, result_id):
+        with self._lock:
+            op = self._operations.get(result_id)
+            self.stats["poll"] += 1
+        if op is None:
+            return None, False
+        now = time.monotonic()
+        done = now >= op["ready_at"]
+        if done:
+            # results stay retrievable for result_ttl after the last fetch; count each once
+            with self._lock:
+                op["expires_at"] = now + self.result_ttl
+                if not op.get("retrieved"):
+                    op["retrieved"] = True
+                    self.stats["succeeded"] += 1
+        return op, done
+
+
+def _make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            # keep load tests quiet; stats are printed on shutdown instead
+            pass
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            if body:
+                self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def _send_error(self, status, code, message, headers=None):
+            body = json.dumps({"error": {"code": code, "message": message}}).encode("utf-8")
+            self._send(status, body, headers)
+
+        def _retry_headers(self):
+            # Retry-After only carries whole seconds and clients prefer it over retry-after-ms,
+            # so sub-second hints are sent as retry-after-ms alone
+            if fake.poll_after >= 1 and float(fake.poll_after).is_integer():
+                return {"Retry-After": str(int(fake.poll_after))}
+            return {"retry-after-ms": str(int(fake.poll_after * 1000))}
+
+        def _prelude(self):
+            # drain the request body so keep-alive connections stay usable
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if fake.latency:
+                time.sleep(fake.latency)
+            if fake.throttled():
+                self._send_error(429, "TooManyRequests", "Simulated rate limit.",
+                                 {"Retry-After": str(max(1, int(fake.retry_after)))})
+                return False
+            return True
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            m = _ANALYZE_RE.match(url.path)
+            if not m:
+                self._send_error(404, "NotFound", f"Unknown path {url.path}")
+                return
+            if not self._prelude():
+                return
+            query = parse_qs(url.query)
+            try:
+                page_ranges = parse_pages((query.get("pages") or [""])[0])
+                result_id = fake.start(m.group(1), query, page_ranges)
+            except ValueError as ex:
+                self._send_error(400, "InvalidArgument", f"Invalid argument 'pages': {ex}")
+                return
+            base = url.path[: -len(":analyze")]
+            api_version = (query.get("api-version") or ["2024-11-30"])[0]
+            host = self.headers.get("Host") or f"{self.server.server_address[0]}:{self.server.server_address[1]}"
+            location = f"http://{host}{base}/analyzeResults/{result_id}?api-version={api_version}"
+            headers = {"Operation-Location": location, "apim-request-id": result_id}
+            headers.update(self._retry_headers())
+            self._send(202, b"", headers)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            m = _RESULT_RE.match(url.path)
+            if not m:
+                self._send_error(404, "NotFound", f"Unknown path {url.path}")
+                return
+            if not self._prelude():
+                return
+            op, done = fake.poll(m.group(2))
+            if op is None:
+                self._send_error(404, "NotFound", "Analyze operation not found.")
+                return
+            now = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+            head = f'{{"status": "{"succeeded" if done else "running"}", "createdDateTime": "{op["created"]}", ' \
+                   f'"lastUpdatedDateTime": "{now}"'
+            if done:
+                body = head.encode("utf-8") + b', "analyzeResult": ' + op["body"] + b"}"
+                self._send(200, body)
+            else:
+                self._send(200, (head + "}").encode("utf-8"), self._retry_headers())
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients dropping keep-alive connections (e.g. after a 429) are expected under load
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(host="127.0.0.1", port=5080, recordings=None, latency=0.0, per_page=0.0, throttle_rate=0.0,
+          poll_after=0.1, retry_after=1, result_ttl=60.0, seed=None):
+    """
+    Create the server without starting it. Returns (server, fake); call server.serve_forever()
+    (or run it in a thread) and server.shutdown() when done. Port 0 picks a free port.
+    """
+    fake = FakeDocumentIntelligence(Recordings(recordings), latency=latency, per_page=per_page,
+                                    throttle_rate=throttle_rate, poll_after=poll_after, retry_after=retry_after,
+                                    result_ttl=result_ttl, seed=seed)
+    server = _Server((host, port), _make_handler(fake))
+    return server, fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Document Intelligence server replaying recorded AnalyzeResult JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=5080, help="Port to listen on")
+    parser.add_argument("--recordings", default=None, help="Directory with layout.json / keyValuePairs.json / queryFields.json")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed delay in seconds added to every request")
+    parser.add_argument("--per-page", type=float, default=0.0, help="Simulated processing seconds per analyzed page")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability (0..1) of answering with 429")
+    parser.add_argument("--poll-after", type=float, default=0.1, help="Retry-After hint in seconds for 202/running responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After in whole seconds for 429 responses")
+    parser.add_argument("--result-ttl", type=float, default=60.0, help="Seconds a finished operation stays retrievable")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for 429 injection")
+    args = parser.parse_args()
+
+    server, fake = serve(args.host, args.port, args.recordings, args.latency, args.per_page,
+                         args.throttle_rate, args.poll_after, args.retry_after, args.result_ttl, args.seed)
+    host, port = server.server_address[:2]
+    print(f"Fake Document Intelligence listening on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests: {fake.stats}")
+
+
+if __name__ == "__main__":
+    main()
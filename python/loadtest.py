@@ -0,0 +1,179 @@
+import argparse
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.core.credentials import AzureKeyCredential
+from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.models import AnalyzeDocumentRequest, DocumentAnalysisFeature
+
+# c:\src\DocumentStudy\python\loadtest.py
+"""
+Load-test driver for the analyze scripts. Issues the same begin_analyze_document calls as
+analyze_layout.py, analyze_general.py and analyze_layout_query_fields.py, concurrently, and
+reports throughput (docs/sec) and end-to-end latency percentiles (submit -> result).
+
+Usage:
+    # against an already running fake_docintel_server.py (or any endpoint)
+    python loadtest.py --endpoint http://127.0.0.1:5080/ --scenario all --requests 200 --concurrency 16
+
+    # start an in-process fake server with 50ms latency, 0.2s/page and 10% 429s
+    python loadtest.py --start-server --latency 0.05 --per-page 0.2 --throttle-rate 0.1 --requests 200
+
+Scenarios:
+    layout          prebuilt-layout on a local file            (analyze_layout.py)
+    keyValuePairs   prebuilt-layout, pages=7, key-value pairs   (analyze_general.py)
+    queryFields     prebuilt-layout, url source, query fields   (analyze_layout_query_fields.py)
+    all             round-robin over the three
+429 responses are retried by the SDK's retry policy (honoring Retry-After), so retries show up
+as added latency rather than failures.
+"""
+
+SCENARIOS = ("layout", "keyValuePairs", "queryFields")
+QUERY_FIELDS = ["Name", "Pronouns", "Heritage", "Subclass", "Evasion", "Armor"]
+FORM_URL = "https://stgfaxes.blob.core.windows.net/raw/Quickstart-Adventure-5-20-2025.pdf"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def analyze(client, scenario, document, polling_interval):
+    # one call per scenario, same arguments as the corresponding analyze script
+    if scenario == "layout":
+        poller = client.begin_analyze_document("prebuilt-layout", body=document,
+                                               polling_interval=polling_interval)
+    elif scenario == "keyValuePairs":
+        poller = client.begin_analyze_document("prebuilt-layout", body=document, pages="7",
+                                               features=[DocumentAnalysisFeature.KEY_VALUE_PAIRS],
+                                               polling_interval=polling_interval)
+    elif scenario == "queryFields":
+        poller = client.begin_analyze_document("prebuilt-layout", AnalyzeDocumentRequest(url_source=FORM_URL),
+                                               pages="7", features=[DocumentAnalysisFeature.QUERY_FIELDS],
+                                               query_fields=QUERY_FIELDS, polling_interval=polling_interval)
+    else:
+        raise ValueError(f"Unsupported scenario: {scenario}")
+    return poller.result()
+
+
+def run(endpoint, key, scenarios, requests, concurrency, document, polling_interval):
+    """
+    Run `requests` analyze calls over `concurrency` worker threads (one client per thread).
+    Returns (wall_seconds, list of (scenario, latency_seconds, error_or_None)).
+    """
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = DocumentIntelligenceClient(endpoint=endpoint, credential=AzureKeyCredential(key))
+        return local.client
+
+    def one(i):
+        scenario = scenarios[i % len(scenarios)]
+        start = time.perf_counter()
+        try:
+            analyze(client(), scenario, document, polling_interval)
+            return scenario, time.perf_counter() - start, None
+        except Exception as ex:
+            return scenario, time.perf_counter() - start, f"{type(ex).__name__}: {ex}"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    return time.perf_counter() - start, results
+
+
+def summarize(wall, results):
+    """
+    Rows of (scenario, count, errors, docs/sec, p50, p99, max) including an '__overall__' row.
+    docs/sec is only set on '__overall__': scenarios share the same wall time in a mixed run,
+    so a per-scenario rate would not be comparable with a single-scenario run.
+    """
+    rows = []
+    groups = {}
+    for scenario, latency, error in results:
+        groups.setdefault(scenario, []).append((latency, error))
+    groups["__overall__"] = [(latency, error) for _, latency, error in results]
+    for scenario, items in groups.items():
+        ok = sorted(latency for latency, error in items if error is None)
+        errors = sum(1 for _, error in items if error is not None)
+        rows.append({
+            "scenario": scenario,
+            "count": len(items),
+            "errors": errors,
+            "docs_per_sec": (len(ok) / wall if wall > 0 else 0.0) if scenario == "__overall__" else None,
+            "p50": percentile(ok, 50),
+            "p99": percentile(ok, 99),
+            "max": ok[-1] if ok else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the analyze calls against a (fake) Document Intelligence endpoint.")
+    parser.add_argument("--endpoint", "-e", default=os.environ.get("DOCUMENTINTELLIGENCE_ENDPOINT", "http://127.0.0.1:5080/"),
+                        help="Endpoint to test (default: $DOCUMENTINTELLIGENCE_ENDPOINT or local fake server)")
+    parser.add_argument("--key", "-k", default=os.environ.get("DOCUMENTINTELLIGENCE_API_KEY", "fake-key"), help="API key")
+    parser.add_argument("--scenario", "-s", default="all", choices=SCENARIOS + ("all",), help="Which analyze call to issue")
+    parser.add_argument("--requests", "-n", type=int, default=100, help="Total number of analyze calls")
+    parser.add_argument("--concurrency", "-c", type=int, default=8, help="Number of concurrent workers")
+    parser.add_argument("--document", "-d", default=None, help="Local file to upload (default: small dummy payload)")
+    parser.add_argument("--polling-interval", type=float, default=0.1, help="SDK polling interval in seconds when no Retry-After is sent")
+    parser.add_argument("--start-server", action="store_true", help="Start fake_docintel_server in-process on a free port")
+    parser.add_argument("--recordings", default=None, help="Recordings directory for --start-server")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake server fixed latency (--start-server)")
+    parser.add_argument("--per-page", type=float, default=0.0, help="Fake server seconds per page (--start-server)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fake server 429 probability (--start-server)")
+    parser.add_argument("--poll-after", type=float, default=0.1, help="Fake server Retry-After hint (--start-server)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Fake server 429 Retry-After seconds (--start-server)")
+    args = parser.parse_args()
+
+    if args.document:
+        with open(args.document, "rb") as f:
+            document = f.read()
+    else:
+        document = b"%PDF-1.4 fake document for load testing\n"
+
+    server = fake = None
+    endpoint = args.endpoint
+    if args.start_server:
+        # imported lazily so pointing at a real endpoint doesn't need the fake server module
+        import fake_docintel_server
+        server, fake = fake_docintel_server.serve(port=0, recordings=args.recordings, latency=args.latency,
+                                                  per_page=args.per_page, throttle_rate=args.throttle_rate,
+                                                  poll_after=args.poll_after, retry_after=args.retry_after)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    print(f"Running {args.requests} requests with concurrency {args.concurrency} against {endpoint}")
+    try:
+        wall, results = run(endpoint, args.key, scenarios, args.requests, args.concurrency, document,
+                            args.polling_interval)
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    print(f"Wall time: {wall:.2f}s")
+    print(f"{'scenario':<15}{'count':>7}{'errors':>8}{'docs/sec':>10}{'p50 (s)':>10}{'p99 (s)':>10}{'max (s)':>10}")
+    for row in summarize(wall, results):
+        fmt = lambda v: f"{v:>10.3f}" if v is not None else f"{'-':>10}"
+        rate = f"{row['docs_per_sec']:>10.2f}" if row["docs_per_sec"] is not None else f"{'-':>10}"
+        print(f"{row['scenario']:<15}{row['count']:>7}{row['errors']:>8}{rate}"
+              f"{fmt(row['p50'])}{fmt(row['p99'])}{fmt(row['max'])}")
+    errors = [error for _, _, error in results if error]
+    if errors:
+        print(f"First error: {errors[0]}")
+    if fake:
+        print(f"Fake server requests: {fake.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import sqlite3
+from datetime import datetime, timezone
+
+# c:\src\DocumentStudy\python\results_store.py
+"""
+Evaluation-history store: keeps every evaluate.py run in one SQLite file so accuracy can be
+compared across runs without loading old CSV reports by hand.
+
+Usage:
+    python evaluate.py -g truth.xlsx -p predictions.jsonl --store evaluations.db --run-label "layout v2"
+    python results_store.py --store evaluations.db runs
+    python results_store.py --store evaluations.db regressions --since 12
+    python results_store.py --store evaluations.db history --field Name
+    python results_store.py --store evaluations.db history --field Name --docid Barnacle
+
+Tables:
+    - runs:          one row per evaluation run with the overall summary metrics
+    - field_results: one row per (field, run) with the per-field report metrics
+    - cell_results:  one row per compared (run, docid, field) ground-truth/prediction pair
+field_results is keyed (field, run_id) and cell_results is indexed on (docid, field), so
+per-field and per-cell history lookups are index range scans rather than table scans.
+"""
+
+# -----------------------
+# Schema
+# -----------------------
+_METRIC_COLUMNS = [
+    "exact_match_rate", "avg_similarity", "numeric_within_tolerance_rate", "missing_rate",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    label TEXT,
+    ground_truth TEXT,
+    predictions TEXT,
+    total_fields INTEGER,
+    exact_matches INTEGER,
+    exact_match_rate REAL,
+    avg_similarity REAL,
+    numeric_comparable INTEGER,
+    numeric_within_tolerance INTEGER,
+    numeric_within_tolerance_rate REAL,
+    missing_predictions INTEGER,
+    missing_rate REAL
+);
+CREATE TABLE IF NOT EXISTS field_results (
+    field TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    total INTEGER,
+    exact_matches INTEGER,
+    exact_match_rate REAL,
+    avg_similarity REAL,
+    numeric_comparable INTEGER,
+    numeric_within_tolerance INTEGER,
+    numeric_within_tolerance_rate REAL,
+    missing_predictions INTEGER,
+    missing_rate REAL,
+    PRIMARY KEY (field, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_field_results_run ON field_results (run_id);
+CREATE TABLE IF NOT EXISTS cell_results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    docid TEXT NOT NULL,
+    field TEXT NOT NULL,
+    ground_truth TEXT,
+    prediction TEXT,
+    exact_match INTEGER,
+    similarity REAL,
+    gt_num REAL,
+    pred_num REAL
+);
+CREATE INDEX IF NOT EXISTS ix_cell_results_docid_field ON cell_results (docid, field, run_id);
+CREATE INDEX IF NOT EXISTS ix_cell_results_run ON cell_results (run_id);
+"""
+
+_FIELD_COLUMNS = [
+    "total", "exact_matches", "exact_match_rate", "avg_similarity", "numeric_comparable",
+    "numeric_within_tolerance", "numeric_within_tolerance_rate", "missing_predictions", "missing_rate",
+]
+
+_CELL_COLUMNS = ["docid", "field", "ground_truth", "prediction", "exact_match", "similarity", "gt_num", "pred_num"]
+
+
+def connect(path):
+    """Open (and create if needed) the store at `path`."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    # WAL keeps readers (regression queries) unblocked while evaluate.py appends a run
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _text(v):
+    # ground truth / predictions can be any JSON value; store them as text like the diffs CSV does
+    if v is None:
+        return None
+    return v if isinstance(v, str) else str(v)
+
+
+# -----------------------
+# Writes
+# -----------------------
+def record_run(conn, report_rows, overall, cells=None, label=None, ground_truth=None, predictions=None):
+    """
+    Append one evaluation run (the outputs of evaluate.evaluate) in a single transaction.
+    report_rows: per-field rows as written to the CSV report
+    overall: overall summary dict
+    cells: optional list of per-cell dicts (docid, field, ground_truth, prediction, exact_match,
+           similarity, gt_num, pred_num)
+    Returns the new run_id.
+    """
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO runs (created_at, label, ground_truth, predictions, total_fields, exact_matches, "
+            "exact_match_rate, avg_similarity, numeric_comparable, numeric_within_tolerance, "
+            "numeric_within_tolerance_rate, missing_predictions, missing_rate) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.now(timezone.utc).isoformat(timespec="seconds"), label, ground_truth, predictions,
+                overall["total_fields"], overall["exact_matches"], overall["exact_match_rate"],
+                overall["avg_similarity"], overall["numeric_comparable"], overall["numeric_within_tolerance"],
+                overall["numeric_within_tolerance_rate"], overall["missing_predictions"], overall["missing_rate"],
+            ),
+        )
+        run_id = cur.lastrowid
+        conn.executemany(
+            f"INSERT INTO field_results (field, run_id, {', '.join(_FIELD_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' for _ in _FIELD_COLUMNS)})",
+            ((row["field"], run_id, *(row[c] for c in _FIELD_COLUMNS)) for row in report_rows),
+        )
+        if cells:
+            conn.executemany(
+                f"INSERT INTO cell_results (run_id, {', '.join(_CELL_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in _CELL_COLUMNS)})",
+                (
+                    (
+                        run_id, _text(c["docid"]), _text(c["field"]), _text(c["ground_truth"]),
+                        _text(c["prediction"]), int(bool(c["exact_match"])), c["similarity"],
+                        c["gt_num"], c["pred_num"],
+                    )
+                    for c in cells
+                ),
+            )
+    return run_id
+
+
+# -----------------------
+# Queries
+# -----------------------
+def list_runs(conn, limit=20):
+    return conn.execute(
+        "SELECT run_id, created_at, label, total_fields, exact_match_rate, avg_similarity, missing_rate "
+        "FROM runs ORDER BY run_id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+
+
+def latest_run_id(conn):
+    row = conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+    return row[0]
+
+
+def regressions(conn, since_run, run=None, metric="exact_match_rate", min_drop=0.0):
+    """
+    Fields whose `metric` dropped between run `since_run` and `run` (default: latest run).
+    missing_rate is treated as lower-is-better, so a rise counts as a drop.
+    Returns rows (field, before, after, delta) ordered by the largest drop first.
+    """
+    if metric not in _METRIC_COLUMNS:
+        raise ValueError(f"Unsupported metric '{metric}'. Choose one of: {_METRIC_COLUMNS}")
+    if run is None:
+        run = latest_run_id(conn)
+    sign = -1.0 if metric == "missing_rate" else 1.0
+    return conn.execute(
+        f"SELECT a.field AS field, a.{metric} AS before, b.{metric} AS after, b.{metric} - a.{metric} AS delta "
+        f"FROM field_results a JOIN field_results b ON b.field = a.field AND b.run_id = ? "
+        f"WHERE a.run_id = ? AND (a.{metric} - b.{metric}) * ? > ? "
+        f"ORDER BY (a.{metric} - b.{metric}) * ? DESC",
+        (run, since_run, sign, min_drop, sign),
+    ).fetchall()
+
+
+def field_history(conn, field, metric="exact_match_rate"):
+    """Per-run values of `metric` for one field, oldest first."""
+    if metric not in _METRIC_COLUMNS:
+        raise ValueError(f"Unsupported metric '{metric}'. Choose one of: {_METRIC_COLUMNS}")
+    return conn.execute(
+        f"SELECT f.run_id AS run_id, r.created_at AS created_at, r.label AS label, f.total AS total, f.{metric} AS {metric} "
+        f"FROM field_results f JOIN runs r ON r.run_id = f.run_id WHERE f.field = ? ORDER BY f.run_id",
+        (field,),
+    ).fetchall()
+
+
+def cell_history(conn, docid, field):
+    """Ground truth / prediction for one (docid, field) across runs, oldest first."""
+    return conn.execute(
+        "SELECT run_id, ground_truth, prediction, exact_match, similarity "
+        "FROM cell_results WHERE docid = ? AND field = ? ORDER BY run_id",
+        (docid, field),
+    ).fetchall()
+
+
+def _print_rows(rows):
+    if not rows:
+        print("(no rows)")
+        return
+    keys = rows[0].keys()
+    print("\t".join(keys))
+    for row in rows:
+        print("\t".join("" if row[k] is None else (f"{row[k]:.4f}" if isinstance(row[k], float) else str(row[k])) for k in keys))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the evaluation-history store written by evaluate.py --store.")
+    parser.add_argument("--store", "-s", default="evaluations.db", help="Path to the SQLite results store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_runs = sub.add_parser("runs", help="List recent runs")
+    p_runs.add_argument("--limit", "-n", type=int, default=20, help="Number of runs to show")
+
+    p_reg = sub.add_parser("regressions", help="Fields whose metric dropped since a given run")
+    p_reg.add_argument("--since", required=True, type=int, help="Baseline run_id")
+    p_reg.add_argument("--run", type=int, default=None, help="Run to compare (default: latest)")
+    p_reg.add_argument("--metric", "-m", default="exact_match_rate", choices=_METRIC_COLUMNS, help="Metric to compare")
+    p_reg.add_argument("--min-drop", type=float, default=0.0, help="Only report drops larger than this")
+
+    p_hist = sub.add_parser("history", help="Per-run history of a field (or of one document's cell)")
+    p_hist.add_argument("--field", "-f", required=True, help="Field name")
+    p_hist.add_argument("--docid", default=None, help="Document id; shows cell values instead of field metrics")
+    p_hist.add_argument("--metric", "-m", default="exact_match_rate", choices=_METRIC_COLUMNS, help="Metric to show")
+    args = parser.parse_args()
+
+    conn = connect(args.store)
+    if args.command == "runs":
+        _print_rows(list_runs(conn, args.limit))
+    elif args.command == "regressions":
+        _print_rows(regressions(conn, args.since, args.run, args.metric, args.min_drop))
+    elif args.command == "history":
+        if args.docid:
+            _print_rows(cell_history(conn, args.docid, args.field))
+        else:
+            _print_rows(field_history(conn, args.field, args.metric))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()